@@ -2,10 +2,29 @@
 Configuration constants and settings
 """
 import ipaddress
+import logging
+import os
+from types import MappingProxyType
 from typing import Dict, Set
 
+logger = logging.getLogger(__name__)
+
+def _positive_int_from_env(name: str, default: int) -> int:
+    """Read a positive integer setting from the environment, falling back to default"""
+    value = os.getenv(name, "").strip()
+    if not value:
+        return default
+    try:
+        parsed = int(value)
+    except ValueError:
+        parsed = 0
+    if parsed < 1:
+        logger.warning("Invalid %s=%r, using default %s", name, value, default)
+        return default
+    return parsed
+
 # File type mappings using magic numbers
-FILE_TYPE_MAPPING = {
+FILE_TYPE_MAPPING = MappingProxyType({
     'application/pdf': '.pdf',
     'application/vnd.openxmlformats-officedocument.wordprocessingml.document': '.docx',
     'application/vnd.openxmlformats-officedocument.presentationml.presentation': '.pptx',
@@ -22,39 +41,75 @@ FILE_TYPE_MAPPING = {
     'image/jpeg': '.jpg',
     'image/png': '.png',
     'image/gif': '.gif'
-}
+})
 
-SUPPORTED_MIME_TYPES = set(FILE_TYPE_MAPPING.keys())
+SUPPORTED_MIME_TYPES = frozenset(FILE_TYPE_MAPPING)
 
 # SSRF Protection Configuration
-BLOCKED_HOSTS = {
+BLOCKED_HOSTS = frozenset({
     'localhost', '0.0.0.0', '127.0.0.1',
     '169.254.169.254',  # AWS/Azure metadata
     'metadata.google.internal',  # Google Cloud metadata
     'metadata', 'metadata.azure.com'  # Additional metadata endpoints
-}
+})
+
+LOCALHOST_VARIATIONS = frozenset({'localhost', '127.0.0.1', '0.0.0.0', '::1'})
+
+SUSPICIOUS_HOSTNAME_PATTERNS = ('metadata', 'internal')
+
+ALLOWED_SCHEMES = frozenset({'http', 'https'})
 
 BLOCKED_NETWORKS = [
+    ipaddress.IPv4Network('0.0.0.0/8'),        # "This" network
     ipaddress.IPv4Network('127.0.0.0/8'),      # Loopback
     ipaddress.IPv4Network('10.0.0.0/8'),       # Private Class A
+    ipaddress.IPv4Network('100.64.0.0/10'),    # Carrier-grade NAT (shared address space)
     ipaddress.IPv4Network('172.16.0.0/12'),    # Private Class B
     ipaddress.IPv4Network('192.168.0.0/16'),   # Private Class C
     ipaddress.IPv4Network('169.254.0.0/16'),   # Link-local
+    ipaddress.IPv4Network('192.0.0.0/24'),     # IETF protocol assignments
+    ipaddress.IPv4Network('192.0.2.0/24'),     # TEST-NET-1
+    ipaddress.IPv4Network('198.51.100.0/24'),  # TEST-NET-2
+    ipaddress.IPv4Network('203.0.113.0/24'),   # TEST-NET-3
+    ipaddress.IPv4Network('198.18.0.0/15'),    # Benchmarking
+    ipaddress.IPv4Network('192.31.196.0/24'),  # AS112 DNS
+    ipaddress.IPv4Network('192.175.48.0/24'),  # AS112 DNS
+    ipaddress.IPv4Network('192.52.193.0/24'),  # AMT
+    ipaddress.IPv4Network('192.88.99.0/24'),   # 6to4 relay anycast (deprecated)
     ipaddress.IPv4Network('224.0.0.0/4'),      # Multicast
     ipaddress.IPv4Network('240.0.0.0/4'),      # Reserved
     ipaddress.IPv6Network('::1/128'),          # IPv6 loopback
+    ipaddress.IPv6Network('::ffff:0:0/96'),    # IPv4-mapped
+    ipaddress.IPv6Network('64:ff9b:1::/48'),   # Local-use NAT64
+    ipaddress.IPv6Network('100::/64'),         # Discard-only
+    ipaddress.IPv6Network('2001:db8::/32'),    # Documentation
     ipaddress.IPv6Network('fc00::/7'),         # IPv6 private
     ipaddress.IPv6Network('fe80::/10'),        # IPv6 link-local
 ]
 
-ALLOWED_PORTS = {80, 443, 8080, 8443}  # Only allow standard HTTP/HTTPS ports
+ALLOWED_PORTS = frozenset({80, 443, 8080, 8443})  # Only allow standard HTTP/HTTPS ports
+
+# Hostname resolution cache (SSRF validation results)
+DNS_CACHE_SIZE = 4096
+DNS_CACHE_POSITIVE_TTL = 600  # seconds
+DNS_CACHE_NEGATIVE_TTL = 60  # seconds
 
 # Application settings
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 MAX_MEMORY_INCREASE = 500  # 500MB
 DOWNLOAD_TIMEOUT = 30  # seconds
 CONVERSION_TIMEOUT = 120  # seconds
+# Processes in the conversion pool. os.cpu_count() reports host CPUs inside containers,
+# so the default is capped; set CONVERSION_WORKERS to match the container's CPU limit.
+MAX_DEFAULT_CONVERSION_WORKERS = 4
+CONVERSION_WORKERS = _positive_int_from_env(
+    "CONVERSION_WORKERS", min(os.cpu_count() or 1, MAX_DEFAULT_CONVERSION_WORKERS)
+)
+CONVERSION_POLL_INTERVAL = 0.5  # seconds between checks on a running conversion
+CONVERSION_WORKER_MAX_TASKS = 50  # conversions before a worker process is recycled
 CHUNK_SIZE = 8192  # bytes
+DISK_WRITE_SIZE = 1024 * 1024  # bytes buffered before each off-loop temp file write
+MAGIC_HEADER_SIZE = 16384  # bytes kept for file type detection (covers libmagic's OOXML heuristics)
 
 # HTTP client settings
 MAX_CONNECTIONS = 20
@@ -0,0 +1,45 @@
+"""
+Shared pytest configuration: static DNS for SSRF tests
+"""
+import socket
+
+import pytest
+
+import security
+
+# Hostnames the fake resolver maps to specific addresses; anything else is public
+STATIC_HOSTS = {
+    'rebind.example.net': '10.0.0.5',
+    'ipv6-loopback.example.net': '::1',
+}
+DEFAULT_PUBLIC_IP = '93.184.216.34'
+
+def _fake_getaddrinfo(host, port, *args, **kwargs):
+    ip = STATIC_HOSTS.get(host, DEFAULT_PUBLIC_IP)
+    if ':' in ip:
+        return [(socket.AF_INET6, socket.SOCK_STREAM, 6, '', (ip, port or 0, 0, 0))]
+    return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', (ip, port or 0))]
+
+def pytest_addoption(parser):
+    parser.addoption("--run-network", action="store_true", default=False,
+                     help="run tests that need real DNS resolution")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "network: test needs real DNS resolution")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-network"):
+        return
+    skip_network = pytest.mark.skip(reason="needs --run-network")
+    for item in items:
+        if "network" in item.keywords:
+            item.add_marker(skip_network)
+
+@pytest.fixture(autouse=True)
+def static_dns(request, monkeypatch):
+    """Replace DNS with static answers (unless the test is marked network) and reset the cache"""
+    security._hostname_cache.clear()
+    if request.node.get_closest_marker("network") is None:
+        monkeypatch.setattr(security.socket, "getaddrinfo", _fake_getaddrinfo)
+    yield
+    security._hostname_cache.clear()
@@ -7,47 +7,200 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import asyncio
 import logging
+import multiprocessing
+from functools import lru_cache
+from typing import List, Optional, Set, Tuple
 from markitdown import MarkItDown
 
-from config import CONVERSION_TIMEOUT
+from config import (
+    CONVERSION_TIMEOUT, CONVERSION_WORKERS, CONVERSION_POLL_INTERVAL, CONVERSION_WORKER_MAX_TASKS,
+    MAX_MEMORY_INCREASE
+)
+from utils import get_process_rss_mb
 
 from openai import OpenAI
 
-# client = OpenAI(api_key="")
-
 logger = logging.getLogger(__name__)
 
-async def convert_with_timeout(file_path: str, timeout: int = CONVERSION_TIMEOUT) -> str:
-    """Convert file with timeout using thread pool"""
-    loop = asyncio.get_event_loop()
-    
-    def convert_sync():
-        """Synchronous conversion function to run in thread pool"""
-        # If OPEN_AI_BASE_URL is provided, configure a custom OpenAI client and model
-        base_url = os.getenv("OPEN_AI_BASE_URL", "").strip()
-        if base_url:
-            api_key = os.getenv("OPEN_AI_API_KEY", "").strip()
-            model = os.getenv("OPEN_AI_MODEL", "").strip() or None
+# Worker pool for CPU-bound conversions (None falls back to the default thread pool)
+_conversion_pool: Optional["_ConversionPool"] = None
+
+class ConversionFailedError(Exception):
+    """MarkItDown raised an error while converting (the worker is still healthy)"""
+
+class _WorkerCrashedError(Exception):
+    """The conversion worker process exited without returning a result"""
+
+@lru_cache(maxsize=8)
+def _build_converter(base_url: str, api_key: str, model: Optional[str]) -> MarkItDown:
+    """Build a MarkItDown converter for the given LLM settings (cached per settings)"""
+    # If OPEN_AI_BASE_URL is provided, configure a custom OpenAI client and model
+    if base_url:
+        try:
+            client = OpenAI(base_url=base_url, api_key=api_key)
+            logger.info("Using custom OpenAI client for MarkItDown conversion (base_url provided)")
+            return MarkItDown(llm_client=client, llm_model=model)
+        except Exception as e:
+            logger.warning("Failed to initialize custom OpenAI client, falling back to default MarkItDown: %s", e)
+    # Default behavior without custom LLM client
+    return MarkItDown()
+
+def _get_llm_settings() -> Tuple[str, str, Optional[str]]:
+    """Read the optional custom OpenAI settings from the environment"""
+    base_url = os.getenv("OPEN_AI_BASE_URL", "").strip()
+    if not base_url:
+        return "", "", None
+    api_key = os.getenv("OPEN_AI_API_KEY", "").strip()
+    model = os.getenv("OPEN_AI_MODEL", "").strip() or None
+    return base_url, api_key, model
+
+def get_converter() -> MarkItDown:
+    """Return the shared MarkItDown converter for the current environment settings"""
+    return _build_converter(*_get_llm_settings())
+
+def _convert_file(file_path: str, settings: Tuple[str, str, Optional[str]]) -> str:
+    """Convert a file with the cached converter for the given LLM settings"""
+    result = _build_converter(*settings).convert(file_path)
+    return result.text_content
+
+def _worker_main(conn) -> None:
+    """Conversion worker process: convert files received over the pipe, one at a time"""
+    get_converter()  # Warm up before the first task arrives
+    while True:
+        try:
+            file_path, settings = conn.recv()
+        except EOFError:
+            break  # Parent closed the pipe
+        try:
+            conn.send(("ok", _convert_file(file_path, settings)))
+        except MemoryError:
+            conn.send(("memory", ""))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+class _ConversionWorker:
+    """A spawned process that converts one file at a time and can be killed on its own"""
+
+    def __init__(self, context):
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.tasks_done = 0
+
+    async def convert(self, file_path: str, settings: Tuple[str, str, Optional[str]], timeout: float) -> str:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        
+        baseline_rss = get_process_rss_mb(self.process.pid)
+        ready = False
+        try:
+            self._conn.send((file_path, settings))
+            # Wait in short slices so an abandoned wait never blocks a thread for long,
+            # checking this task's memory growth (real RSS) between slices
+            while not ready and loop.time() < deadline:
+                ready = await asyncio.to_thread(self._conn.poll, CONVERSION_POLL_INTERVAL)
+                rss = get_process_rss_mb(self.process.pid)
+                if not ready and baseline_rss is not None and rss is not None \
+                        and rss - baseline_rss > MAX_MEMORY_INCREASE:
+                    raise MemoryError()
+            if ready:
+                status, payload = await asyncio.to_thread(self._conn.recv)
+        except (EOFError, OSError):
+            raise _WorkerCrashedError() from None
+        
+        if not ready:
+            raise asyncio.TimeoutError()
+        self.tasks_done += 1
+        if status == "memory":
+            raise MemoryError()
+        if status == "error":
+            raise ConversionFailedError(payload)
+        return payload
+
+    def stop(self) -> None:
+        self._conn.close()
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=1)
+
+class _ConversionPool:
+    """Fixed number of conversion worker processes; a stuck or crashed worker is replaced alone"""
+
+    def __init__(self, max_workers: int):
+        self._context = multiprocessing.get_context("spawn")
+        self._slots = asyncio.Semaphore(max_workers)
+        self._workers: Set[_ConversionWorker] = set()
+        self._idle: List[_ConversionWorker] = [self._spawn() for _ in range(max_workers)]
+
+    def _spawn(self) -> _ConversionWorker:
+        worker = _ConversionWorker(self._context)
+        self._workers.add(worker)
+        return worker
+
+    def _discard(self, worker: _ConversionWorker) -> None:
+        self._workers.discard(worker)
+        worker.stop()
+
+    async def convert(self, file_path: str, settings: Tuple[str, str, Optional[str]], timeout: float) -> str:
+        async with self._slots:
+            worker = self._idle.pop() if self._idle else self._spawn()
+            healthy = False
             try:
-                client = OpenAI(base_url=base_url, api_key=api_key)
-                logger.info("Using custom OpenAI client for MarkItDown conversion (base_url provided)")
-                md_converter = MarkItDown(llm_client=client, llm_model=model)
-            except Exception as e:
-                logger.warning(f"Failed to initialize custom OpenAI client, falling back to default MarkItDown: {e}")
-                md_converter = MarkItDown()
-        else:
-            # Default behavior without custom LLM client
-            md_converter = MarkItDown()
-        result = md_converter.convert(file_path)
-        return result.text_content
+                result = await worker.convert(file_path, settings, timeout)
+                healthy = True
+                return result
+            except ConversionFailedError:
+                healthy = True
+                raise
+            finally:
+                if healthy and worker.process.is_alive() and worker.tasks_done < CONVERSION_WORKER_MAX_TASKS:
+                    self._idle.append(worker)
+                else:
+                    # Timed out, crashed, over its memory limit, cancelled mid-task, or due
+                    # for recycling (freed memory is rarely returned to the OS): replace
+                    # only this worker and start warming up its successor
+                    self._discard(worker)
+                    self._idle.append(self._spawn())
+
+    def shutdown(self) -> None:
+        for worker in list(self._workers):
+            self._discard(worker)
+        self._idle.clear()
+
+def start_conversion_pool(max_workers: int = CONVERSION_WORKERS) -> None:
+    """Start the conversion worker processes, falling back to threads where processes are unavailable"""
+    global _conversion_pool
+    try:
+        _conversion_pool = _ConversionPool(max_workers)
+        logger.info("Conversion pool started with %s worker processes", max_workers)
+    except (OSError, NotImplementedError) as e:
+        _conversion_pool = None
+        logger.warning("Worker processes unavailable, converting in threads instead: %s", e)
+
+def shutdown_conversion_pool() -> None:
+    """Stop all conversion worker processes"""
+    global _conversion_pool
+    if _conversion_pool:
+        _conversion_pool.shutdown()
+        _conversion_pool = None
+        logger.info("Conversion pool shut down")
+
+async def convert_with_timeout(file_path: str, timeout: int = CONVERSION_TIMEOUT) -> str:
+    """Convert file with timeout using the conversion worker processes"""
+    settings = _get_llm_settings()
     
     try:
-        # Run conversion in thread pool with timeout
-        result = await asyncio.wait_for(
-            loop.run_in_executor(None, convert_sync),
-            timeout=timeout
-        )
-        return result
+        if _conversion_pool is None:
+            # Thread fallback: a timed-out conversion cannot be stopped, only abandoned
+            return await asyncio.wait_for(asyncio.to_thread(_convert_file, file_path, settings), timeout=timeout)
+        return await _conversion_pool.convert(file_path, settings, timeout)
     except asyncio.TimeoutError:
-        logger.error(f"Conversion timed out after {timeout} seconds")
+        logger.error("Conversion timed out after %s seconds", timeout)
         raise Exception(f"Conversion timed out after {timeout} seconds")
+    except MemoryError:
+        logger.error("Conversion exceeded the %sMB memory limit", MAX_MEMORY_INCREASE)
+        raise Exception(f"Conversion exceeded the memory limit ({MAX_MEMORY_INCREASE}MB)")
+    except _WorkerCrashedError:
+        logger.error("Conversion worker process died")
+        raise Exception("Conversion worker process crashed")
@@ -10,7 +10,6 @@ from fastapi import FastAPI, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import httpx
-import magic
 
 # Add current directory to Python path for module imports
 import sys
@@ -19,16 +18,16 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Local imports
 from config import (
-    MAX_FILE_SIZE, MAX_MEMORY_INCREASE, CHUNK_SIZE,
+    MAX_FILE_SIZE, CHUNK_SIZE, DISK_WRITE_SIZE, MAGIC_HEADER_SIZE,
     MAX_CONNECTIONS, MAX_KEEPALIVE_CONNECTIONS, HTTP_TIMEOUT, USER_AGENT,
-    FILE_TYPE_MAPPING
+    FILE_TYPE_MAPPING, SUPPORTED_MIME_TYPES
 )
 from models import ConvertRequest, ConvertResponse
-from security import validate_url_security
-from utils import validate_file_type, get_memory_usage, get_file_extension_from_mime
-from conversion import convert_with_timeout
+from utils import detect_mime_type, get_memory_usage
+from conversion import convert_with_timeout, start_conversion_pool, shutdown_conversion_pool
 
 logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 # Global HTTP client for connection pooling
 http_client: Optional[httpx.AsyncClient] = None
@@ -43,14 +42,18 @@ async def lifespan(app: FastAPI):
         limits=httpx.Limits(max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS, max_connections=MAX_CONNECTIONS),
         headers={"User-Agent": USER_AGENT}
     )
-    logging.info("HTTP client initialized")
+    logger.info("HTTP client initialized")
+    
+    # Conversions run in worker processes, each holding its own MarkItDown converter
+    start_conversion_pool()
     
     yield
     
     # Shutdown
     if http_client:
         await http_client.aclose()
-        logging.info("HTTP client closed")
+        logger.info("HTTP client closed")
+    shutdown_conversion_pool()
 
 app = FastAPI(
     title="Document to Markdown Converter",
@@ -73,13 +76,12 @@ async def health_check():
 
 @app.post("/convert", response_model=ConvertResponse)
 async def convert_document(request: ConvertRequest) -> ConvertResponse:
-    logger = logging.getLogger(__name__)
     temp_path = None
     start_time = time.time()
     
-    # Monitor initial memory usage
+    # Log peak memory of the server process (conversions are limited inside the workers)
     initial_memory = get_memory_usage()
-    logger.info(f"Initial memory usage: {initial_memory['rss_mb']:.2f}MB ({initial_memory['percent']:.1f}%)")
+    logger.info("Initial peak RSS: %.2fMB (%.1f%%)", initial_memory['rss_mb'], initial_memory['percent'])
     
     try:
         global http_client
@@ -89,17 +91,9 @@ async def convert_document(request: ConvertRequest) -> ConvertResponse:
         url_str = str(request.url)
         parsed_url = urlparse(url_str)
         
-        logger.info(f"Processing conversion for URL: {url_str}")
+        logger.info("Processing conversion for URL: %s", url_str)
         
-        # Additional runtime URL security check (defense in depth)
-        is_secure, security_message = validate_url_security(url_str)
-        if not is_secure:
-            logger.warning(f"Runtime URL security check failed: {security_message}")
-            return ConvertResponse(
-                success=False,
-                error=f"URL security validation failed: {security_message}",
-                processing_time=time.time() - start_time
-            )
+        # URL security is already enforced by the ConvertRequest validator
         
         # Get file extension from URL for temp file naming
         file_ext = os.path.splitext(parsed_url.path)[1].lower()
@@ -109,59 +103,86 @@ async def convert_document(request: ConvertRequest) -> ConvertResponse:
             async with http_client.stream('GET', url_str) as response:
                 response.raise_for_status()
                 
-                # Check content length
+                # Check content length before anything touches the disk
                 content_length = response.headers.get('Content-Length')
-                if content_length and int(content_length) > MAX_FILE_SIZE:
-                    raise ValueError(f"File too large (>{MAX_FILE_SIZE // (1024*1024)}MB)")
-                
-                # Create temporary file
-                with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as temp_file:
-                    temp_path = temp_file.name
+                expected_size = None
+                if content_length:
+                    try:
+                        expected_size = int(content_length)
+                    except ValueError:
+                        raise ValueError(f"Invalid Content-Length header: {content_length}") from None
+                    if expected_size > MAX_FILE_SIZE:
+                        raise ValueError(f"File too large (>{MAX_FILE_SIZE // (1024*1024)}MB)")
+                else:
+                    # Chunked transfer encoding: size is enforced while streaming
+                    logger.info("No Content-Length header, enforcing size limit during download")
                 
-                # Download with size and memory monitoring
+                # Download with size and memory monitoring, streaming straight to a temp file
                 downloaded_size = 0
-                file_content = bytearray()
+                file_head = bytearray()  # Only the header is kept in memory for type detection
+                mime_type = None
+                type_checked = False
                 
-                async for chunk in response.aiter_bytes(chunk_size=CHUNK_SIZE):
-                    downloaded_size += len(chunk)
-                    
-                    # Size check
-                    if downloaded_size > MAX_FILE_SIZE:
-                        raise ValueError(f"File too large (>{MAX_FILE_SIZE // (1024*1024)}MB)")
-                    
-                    # Memory check
-                    current_memory = get_memory_usage()
-                    if current_memory['rss_mb'] > initial_memory['rss_mb'] + MAX_MEMORY_INCREASE:
-                        logger.warning(f"High memory usage detected: {current_memory['rss_mb']:.2f}MB")
-                        raise ValueError("Memory usage limit exceeded during download")
+                # Disk I/O runs in worker threads so it never blocks the event loop
+                fd, temp_path = await asyncio.to_thread(tempfile.mkstemp, suffix=file_ext)
+                write_buffer = bytearray()
+                
+                with os.fdopen(fd, 'wb') as temp_file:
+                    async for chunk in response.aiter_bytes(chunk_size=CHUNK_SIZE):
+                        downloaded_size += len(chunk)
+                        
+                        # Size check
+                        if downloaded_size > MAX_FILE_SIZE:
+                            raise ValueError(f"File too large (>{MAX_FILE_SIZE // (1024*1024)}MB)")
+                        
+                        write_buffer.extend(chunk)
+                        if len(write_buffer) >= DISK_WRITE_SIZE:
+                            await asyncio.to_thread(temp_file.write, write_buffer)
+                            write_buffer.clear()
+                        
+                        # Detect file type as soon as the header has arrived
+                        if not type_checked:
+                            file_head.extend(chunk[:MAGIC_HEADER_SIZE - len(file_head)])
+                            if len(file_head) >= MAGIC_HEADER_SIZE:
+                                type_checked = True
+                                mime_type = detect_mime_type(bytes(file_head))
+                                if mime_type not in SUPPORTED_MIME_TYPES:
+                                    break  # Stop downloading unsupported files
                     
-                    file_content.extend(chunk)
+                    # Rejected files are discarded, so don't flush their body to disk
+                    rejected = type_checked and mime_type not in SUPPORTED_MIME_TYPES
+                    if write_buffer and not rejected:
+                        await asyncio.to_thread(temp_file.write, write_buffer)
+                
+                # Files smaller than the header are checked once fully downloaded
+                if file_head and not type_checked:
+                    mime_type = detect_mime_type(bytes(file_head))
                 
-                # Validate file type using magic bytes
-                if file_content:
-                    detected_mime = validate_file_type(bytes(file_content))
-                    if detected_mime:
-                        detected_ext = get_file_extension_from_mime(detected_mime)
-                        logger.info(f"Detected file type: {detected_mime} -> {detected_ext}")
+                # Validate file type using magic bytes (detected once, reused for logging)
+                if file_head:
+                    if mime_type in SUPPORTED_MIME_TYPES:
+                        detected_ext = FILE_TYPE_MAPPING.get(mime_type, "unknown")
+                        logger.info("Detected file type: %s -> %s", mime_type, detected_ext)
                         file_ext = detected_ext
                     else:
-                        logger.warning(f"Unsupported file type detected. MIME: {magic.from_buffer(bytes(file_content), mime=True)}")
+                        logger.warning("Unsupported file type detected. MIME: %s", mime_type)
+                        # An early rejection stops the download, so only Content-Length knows the real size
+                        if expected_size is not None:
+                            file_size = expected_size
+                        else:
+                            file_size = 0 if rejected else downloaded_size
                         return ConvertResponse(
                             success=False,
                             error="Unsupported file type detected",
                             processing_time=time.time() - start_time,
-                            file_size=downloaded_size
+                            file_size=file_size
                         )
-                
-                # Write to temp file
-                with open(temp_path, 'wb') as f:
-                    f.write(file_content)
             
-            logger.info(f"Downloaded file of size: {downloaded_size} bytes, type: {file_ext}")
+            logger.info("Downloaded file of size: %s bytes, type: %s", downloaded_size, file_ext)
             
             # Monitor memory before conversion
             pre_conversion_memory = get_memory_usage()
-            logger.info(f"Pre-conversion memory: {pre_conversion_memory['rss_mb']:.2f}MB")
+            logger.info("Pre-conversion peak RSS: %.2fMB", pre_conversion_memory['rss_mb'])
             
             # Convert to markdown with timeout
             markdown_content = await convert_with_timeout(temp_path)
@@ -179,8 +200,8 @@ async def convert_document(request: ConvertRequest) -> ConvertResponse:
             final_memory = get_memory_usage()
             processing_time = time.time() - start_time
             
-            logger.info(f"Conversion completed successfully in {processing_time:.2f}s")
-            logger.info(f"Final memory usage: {final_memory['rss_mb']:.2f}MB")
+            logger.info("Conversion completed successfully in %.2fs", processing_time)
+            logger.info("Final peak RSS: %.2fMB", final_memory['rss_mb'])
             
             return ConvertResponse(
                 success=True,
@@ -191,35 +212,35 @@ async def convert_document(request: ConvertRequest) -> ConvertResponse:
             )
             
         except httpx.HTTPStatusError as e:
-            logger.error(f"HTTP error downloading file: {e}")
+            logger.error("HTTP error downloading file: %s", e)
             return ConvertResponse(
                 success=False,
                 error=f"Failed to download file: HTTP {e.response.status_code}",
                 processing_time=time.time() - start_time
             )
         except httpx.RequestError as e:
-            logger.error(f"Request error downloading file: {e}")
+            logger.error("Request error downloading file: %s", e)
             return ConvertResponse(
                 success=False,
                 error=f"Failed to download file: Connection error",
                 processing_time=time.time() - start_time
             )
         except ValueError as e:
-            logger.error(f"Validation error: {e}")
+            logger.error("Validation error: %s", e)
             return ConvertResponse(
                 success=False,
                 error=str(e),
                 processing_time=time.time() - start_time
             )
         except asyncio.TimeoutError as e:
-            logger.error(f"Timeout error: {e}")
+            logger.error("Timeout error: %s", e)
             return ConvertResponse(
                 success=False,
                 error="Conversion timed out",
                 processing_time=time.time() - start_time
             )
         except Exception as e:
-            logger.error(f"Conversion failed: {e}")
+            logger.error("Conversion failed: %s", e)
             return ConvertResponse(
                 success=False,
                 error=f"Conversion failed: {str(e)}",
@@ -227,15 +248,17 @@ async def convert_document(request: ConvertRequest) -> ConvertResponse:
             )
         finally:
             # Clean up temp file
-            if temp_path and os.path.exists(temp_path):
+            if temp_path:
                 try:
-                    os.unlink(temp_path)
+                    await asyncio.to_thread(os.unlink, temp_path)
                     logger.info("Temporary file cleaned up")
+                except FileNotFoundError:
+                    pass
                 except Exception as e:
-                    logger.warning(f"Failed to clean up temp file: {e}")
+                    logger.warning("Failed to clean up temp file: %s", e)
                 
     except Exception as e:
-        logger.error(f"Request processing failed: {e}")
+        logger.error("Request processing failed: %s", e)
         return ConvertResponse(
             success=False,
             error=f"Request processing failed: {str(e)}",
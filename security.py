@@ -8,68 +8,164 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 import socket
 import ipaddress
 import logging
+import re
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
 from typing import Optional
 from urllib.parse import urlparse
 
-from config import BLOCKED_HOSTS, BLOCKED_NETWORKS, ALLOWED_PORTS
+from config import (
+    BLOCKED_HOSTS, BLOCKED_NETWORKS, ALLOWED_PORTS, ALLOWED_SCHEMES,
+    LOCALHOST_VARIATIONS, SUSPICIOUS_HOSTNAME_PATTERNS,
+    DNS_CACHE_SIZE, DNS_CACHE_POSITIVE_TTL, DNS_CACHE_NEGATIVE_TTL
+)
 
 logger = logging.getLogger(__name__)
 
+# LRU of hostname -> (resolved safely, expiry timestamp)
+_hostname_cache: "OrderedDict[str, tuple[bool, float]]" = OrderedDict()
+_hostname_cache_lock = threading.Lock()
+
+_ALLOWED_PORTS_TEXT = ', '.join(str(port) for port in sorted(ALLOWED_PORTS))
+_find_suspicious_pattern = re.compile('|'.join(map(re.escape, SUSPICIOUS_HOSTNAME_PATTERNS))).search
+
+class _BlockedRanges:
+    """Sorted, merged address ranges for one IP version, searched with bisect"""
+    __slots__ = ('_starts', '_ends')
+
+    def __init__(self, networks):
+        collapsed = list(ipaddress.collapse_addresses(networks))
+        self._starts = [int(network.network_address) for network in collapsed]
+        self._ends = [int(network.broadcast_address) for network in collapsed]
+
+    def contains(self, value: int) -> bool:
+        """Check whether the address falls inside any blocked range"""
+        idx = bisect_right(self._starts, value) - 1
+        return idx >= 0 and value <= self._ends[idx]
+
+_BLOCKED_V4_RANGES = _BlockedRanges(n for n in BLOCKED_NETWORKS if n.version == 4)
+_BLOCKED_V6_RANGES = _BlockedRanges(n for n in BLOCKED_NETWORKS if n.version == 6)
+
+# IPv6 prefixes whose low 32 bits carry an IPv4 address (:: and ::1 are rejected earlier)
+_NAT64_WELL_KNOWN_PREFIX = ipaddress.IPv6Network('64:ff9b::/96')
+_IPV4_COMPATIBLE_PREFIX = ipaddress.IPv6Network('::/96')
+
+def _split_blocked_hosts() -> tuple[frozenset, frozenset]:
+    """Split BLOCKED_HOSTS into (version, int) keys for literal IPs and lowercase hostnames"""
+    ip_keys, hostnames = set(), set()
+    for host in BLOCKED_HOSTS:
+        try:
+            ip = ipaddress.ip_address(host)
+            ip_keys.add((ip.version, int(ip)))
+        except ValueError:
+            hostnames.add(host.lower())
+    return frozenset(ip_keys), frozenset(hostnames)
+
+_BLOCKED_IP_KEYS, _BLOCKED_HOSTNAMES = _split_blocked_hosts()
+
 def validate_ip_address(ip_str: str) -> bool:
     """Validate that an IP address is not in blocked networks"""
     try:
         ip = ipaddress.ip_address(ip_str)
         
         # Check against blocked networks
-        for network in BLOCKED_NETWORKS:
-            if ip in network:
-                return False
+        ranges = _BLOCKED_V6_RANGES if ip.version == 6 else _BLOCKED_V4_RANGES
+        if ranges.contains(int(ip)):
+            return False
                 
-        # Additional checks for dangerous addresses
-        if ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_multicast:
+        # Only globally routable addresses are allowed; is_global already excludes
+        # private, loopback, link-local, unspecified and reserved ranges
+        if not ip.is_global or ip.is_multicast:
             return False
+        
+        # IPv6 addresses embedding an IPv4 address must pass the IPv4 checks too
+        # (IPv4-mapped ::ffff:0:0/96 is blocked outright via BLOCKED_NETWORKS)
+        if ip.version == 6:
+            embedded = ip.sixtofour
+            if embedded is None and (ip in _NAT64_WELL_KNOWN_PREFIX or ip in _IPV4_COMPATIBLE_PREFIX):
+                embedded = ipaddress.IPv4Address(int(ip) & 0xFFFFFFFF)
+            if embedded is not None:
+                return validate_ip_address(str(embedded))
             
         return True
     except ValueError:
         return False
 
+def _is_ip_literal(hostname: str) -> Optional[int]:
+    """Return the address family if hostname is a literal IP address, else None"""
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            socket.inet_pton(family, hostname)
+            return family
+        except (OSError, ValueError):
+            pass
+    return None
+
 def resolve_hostname_safely(hostname: str) -> Optional[str]:
     """Safely resolve hostname and validate the resulting IP"""
+    # Literal IPs need no resolver round-trip
+    if _is_ip_literal(hostname) is not None:
+        if not validate_ip_address(hostname):
+            logger.warning("Blocked IP address: %s", hostname)
+            return None
+        return hostname
+    
     try:
-        # Get all IP addresses for the hostname
-        addr_info = socket.getaddrinfo(hostname, None)
+        # Get all unique IP addresses for the hostname (one entry per address)
+        addr_info = socket.getaddrinfo(hostname, None, type=socket.SOCK_STREAM)
+        resolved_ips = {sockaddr[0] for family, type, proto, canonname, sockaddr in addr_info}
         
-        for family, type, proto, canonname, sockaddr in addr_info:
-            ip = sockaddr[0]
-            
+        for ip in resolved_ips:
             # IPv6 addresses might be in brackets, remove them
             if ip.startswith('[') and ip.endswith(']'):
                 ip = ip[1:-1]
                 
             # Validate each resolved IP
             if not validate_ip_address(ip):
-                logger.warning(f"Blocked IP resolution: {hostname} -> {ip}")
+                logger.warning("Blocked IP resolution: %s -> %s", hostname, ip)
                 return None
                 
         return hostname  # All IPs are safe
         
     except (socket.gaierror, socket.error) as e:
-        logger.error(f"DNS resolution failed for {hostname}: {e}")
+        logger.error("DNS resolution failed for %s: %s", hostname, e)
         return None
 
+def _validate_hostname_cached(hostname: str) -> bool:
+    """Resolve and validate a hostname, reusing recent results within their TTL"""
+    now = time.monotonic()
+    with _hostname_cache_lock:
+        entry = _hostname_cache.get(hostname)
+        if entry is not None and now < entry[1]:
+            _hostname_cache.move_to_end(hostname)
+            return entry[0]
+    
+    is_safe = resolve_hostname_safely(hostname) is not None
+    ttl = DNS_CACHE_POSITIVE_TTL if is_safe else DNS_CACHE_NEGATIVE_TTL
+    
+    with _hostname_cache_lock:
+        _hostname_cache[hostname] = (is_safe, now + ttl)
+        _hostname_cache.move_to_end(hostname)
+        if len(_hostname_cache) > DNS_CACHE_SIZE:
+            _hostname_cache.popitem(last=False)
+    return is_safe
+
 def validate_url_security(url: str) -> tuple[bool, str]:
     """Comprehensive URL security validation to prevent SSRF attacks"""
     try:
         parsed = urlparse(url)
         
+        # Checks run cheapest first: set lookups, IP parsing, pattern scan, then DNS
         # Check scheme
-        if parsed.scheme not in ['http', 'https']:
+        if parsed.scheme not in ALLOWED_SCHEMES:
             return False, f"Invalid scheme: {parsed.scheme}. Only http/https allowed."
         
         # Check port
         port = parsed.port
         if port and port not in ALLOWED_PORTS:
-            return False, f"Port {port} not allowed. Only ports {ALLOWED_PORTS} are permitted."
+            return False, f"Port {port} not allowed. Only ports {_ALLOWED_PORTS_TEXT} are permitted."
         
         hostname = parsed.hostname
         if not hostname:
@@ -77,31 +173,30 @@ def validate_url_security(url: str) -> tuple[bool, str]:
         
         # Check for blocked hostnames
         hostname_lower = hostname.lower()
-        if hostname_lower in BLOCKED_HOSTS:
+        if hostname_lower in _BLOCKED_HOSTNAMES:
             return False, f"Blocked hostname: {hostname}"
         
         # Check for obvious localhost variations
-        localhost_variations = ['localhost', '127.0.0.1', '0.0.0.0', '::1']
-        if hostname_lower in localhost_variations:
+        if hostname_lower in LOCALHOST_VARIATIONS:
             return False, f"Localhost access blocked: {hostname}"
         
-        # If hostname is an IP address, validate directly
-        if hostname.replace('.', '').replace(':', '').isdigit() or ':' in hostname:
-            try:
-                # Try to parse as IP address
-                if not validate_ip_address(hostname):
-                    return False, f"Blocked IP address: {hostname}"
-            except:
-                pass  # Not a valid IP, continue with hostname resolution
+        # If hostname is an IP address, validate directly without DNS resolution
+        if _is_ip_literal(hostname) is not None:
+            ip = ipaddress.ip_address(hostname)
+            if (ip.version, int(ip)) in _BLOCKED_IP_KEYS:
+                return False, f"Blocked hostname: {hostname}"
+            if not validate_ip_address(hostname):
+                return False, f"Blocked IP address: {hostname}"
+            return True, "URL validation passed"
+        
+        # Additional URL pattern checks (only meaningful for names, not IP literals)
+        if _find_suspicious_pattern(hostname_lower):
+            return False, f"Suspicious hostname pattern detected: {hostname}"
         
         # Resolve hostname and validate resulting IPs
-        if not resolve_hostname_safely(hostname):
+        if not _validate_hostname_cached(hostname_lower):
             return False, f"Hostname resolution failed or resolved to blocked IP: {hostname}"
         
-        # Additional URL pattern checks
-        if any(blocked in hostname_lower for blocked in ['metadata', 'internal']):
-            return False, f"Suspicious hostname pattern detected: {hostname}"
-        
         return True, "URL validation passed"
         
     except Exception as e:
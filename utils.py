@@ -6,33 +6,55 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 import magic
-import psutil
 import logging
+import resource
+import threading
 from typing import Dict, Optional
 
-from config import SUPPORTED_MIME_TYPES, FILE_TYPE_MAPPING
-
 logger = logging.getLogger(__name__)
 
-def validate_file_type(file_content: bytes) -> Optional[str]:
-    """Validate file type using magic bytes and return MIME type"""
+# ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+_MAXRSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+def _get_total_memory() -> int:
+    """Total physical memory in bytes (0 if unavailable)"""
     try:
-        mime_type = magic.from_buffer(file_content, mime=True)
-        return mime_type if mime_type in SUPPORTED_MIME_TYPES else None
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return 0
+
+_TOTAL_MEMORY = _get_total_memory()
+
+# libmagic cookies are not thread-safe, so each thread keeps its own handle
+_magic_local = threading.local()
+
+def _get_magic() -> magic.Magic:
+    """Return this thread's MIME-detecting libmagic handle"""
+    handle = getattr(_magic_local, 'handle', None)
+    if handle is None:
+        handle = _magic_local.handle = magic.Magic(mime=True)
+    return handle
+
+def detect_mime_type(file_content: bytes) -> Optional[str]:
+    """Detect MIME type from magic bytes (None if detection fails)"""
+    try:
+        return _get_magic().from_buffer(file_content)
     except Exception as e:
-        logger.warning(f"Magic byte detection failed: {e}")
+        logger.warning("Magic byte detection failed: %s", e)
         return None
 
 def get_memory_usage() -> Dict[str, float]:
-    """Get current memory usage statistics"""
-    process = psutil.Process()
-    memory_info = process.memory_info()
+    """Get process memory usage statistics (peak resident set size)"""
+    rss_bytes = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
     return {
-        "rss_mb": memory_info.rss / 1024 / 1024,  # Resident Set Size
-        "vms_mb": memory_info.vms / 1024 / 1024,  # Virtual Memory Size
-        "percent": process.memory_percent()
+        "rss_mb": rss_bytes / 1024 / 1024,  # Peak Resident Set Size
+        "percent": rss_bytes / _TOTAL_MEMORY * 100 if _TOTAL_MEMORY else 0.0
     }
 
-def get_file_extension_from_mime(mime_type: str) -> str:
-    """Get file extension from MIME type"""
-    return FILE_TYPE_MAPPING.get(mime_type, "unknown")
\ No newline at end of file
+def get_process_rss_mb(pid: int) -> Optional[float]:
+    """Current resident set size of a process in MB (None if unavailable)"""
+    try:
+        with open(f'/proc/{pid}/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        return None